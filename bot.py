@@ -1,13 +1,19 @@
+import asyncio
+import atexit
 import logging
 import os
 import sqlite3
-from dataclasses import dataclass
+import threading
+from bisect import insort
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from operator import attrgetter
 from zoneinfo import ZoneInfo
-from typing import Optional
+from typing import Any, Callable, Iterator, Optional, TypeVar
 
 from telegram import Update
-from telegram.constants import ParseMode
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -18,9 +24,149 @@ DB_PATH = os.environ.get("REMINDER_DB", "reminders.db")
 DATETIME_FORMAT = "%Y-%m-%d %H:%M"
 MOSCOW_TZ = ZoneInfo("Europe/Moscow")
 ADMIN_CHAT_ID = int(os.environ.get("ADMIN_CHAT_ID", "0"))
+CONTACT_CACHE_SIZE = 1024
+DELETE_SWEEP_INTERVAL_SECONDS = 60
+DELETE_BATCH_SIZE = 500
+
+MSG_START = (
+    "Привет! Я напоминалка.\n"
+    "Ты можешь создавать напоминания только себе через /remindme и /repeatme.\n"
+    "Администратор управляет контактами и напоминаниями других пользователей."
+)
+MSG_HELP = (
+    "Команды для всех пользователей:\n"
+    "/remindme <YYYY-MM-DD> <HH:MM> <текст>\n"
+    "/repeatme <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>\n"
+    "/my — список своих напоминаний\n"
+    "/cancelme <id> — отменить своё напоминание\n\n"
+    "Команды администратора:\n"
+    "/contacts — список контактов\n"
+    "/setname <chat_id> <имя> — задать имя контакта\n"
+    "/remind <имя> <YYYY-MM-DD> <HH:MM> <текст>\n"
+    "/repeat <имя> <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>\n"
+    "/list — список всех напоминаний\n"
+    "/cancel <id> — отменить напоминание\n\n"
+    "Время указывается в МСК."
+)
+MSG_ADMIN_ONLY = "Эта команда доступна только администратору."
+MSG_SETNAME_USAGE = "Формат: /setname <chat_id> <имя>"
+MSG_REMINDME_USAGE = "Формат: /remindme <YYYY-MM-DD> <HH:MM> <текст>"
+MSG_REPEATME_USAGE = "Формат: /repeatme <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>"
+MSG_CANCELME_USAGE = "Формат: /cancelme <id>"
+MSG_REMIND_USAGE = (
+    "Формат: /remind <имя> <YYYY-MM-DD> <HH:MM> <текст>\n"
+    "Пример: /remind Иван 2024-12-31 09:00 Позвонить"
+)
+MSG_REPEAT_USAGE = "Формат: /repeat <имя> <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>"
+MSG_CANCEL_USAGE = "Формат: /cancel <id>"
+MSG_EMPTY_NAME = "Имя не может быть пустым."
+MSG_EMPTY_MESSAGE = "Текст напоминания не может быть пустым."
+MSG_BAD_DATE = "Не могу разобрать дату. Используй формат YYYY-MM-DD HH:MM (МСК)."
+MSG_PAST_DATE = "Дата должна быть в будущем."
+MSG_BAD_INTERVAL = "Интервал должен быть числом (в минутах)."
+MSG_NONPOSITIVE_INTERVAL = "Интервал должен быть больше нуля."
+MSG_BAD_ID = "ID должен быть числом."
+MSG_REMINDER_NOT_FOUND = "Напоминание не найдено."
+MSG_CONTACT_NOT_FOUND = "Контакт не найден. Проверь /contacts."
+MSG_CONTACT_NOT_FOUND_START = (
+    "Контакт не найден. Проверь /contacts или попроси человека сделать /start."
+)
+MSG_NO_CONTACTS = "Контактов пока нет. Используй /setname."
+MSG_NO_USER_REMINDERS = "У тебя нет активных напоминаний."
+MSG_NO_REMINDERS = "Напоминаний нет."
+CONTACTS_HEADER = "Доступные контакты:\n"
+USER_REMINDERS_HEADER = "Твои напоминания:\n"
+ALL_REMINDERS_HEADER = "Все напоминания:\n"
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
+)
+
+REMINDERS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creator_chat_id INTEGER NOT NULL,
+    target_chat_id INTEGER NOT NULL,
+    remind_at INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    repeat_interval_minutes INTEGER
+)
+"""
 
+REMINDER_COLUMNS_SQL = (
+    "id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes"
+)
+INSERT_REMINDER_SQL = """
+INSERT INTO reminders (
+    creator_chat_id,
+    target_chat_id,
+    remind_at,
+    message,
+    repeat_interval_minutes
+)
+VALUES (?, ?, ?, ?, ?)
+"""
+DELETE_OWNED_REMINDER_SQL = (
+    "DELETE FROM reminders WHERE id = ? AND (? IS NULL OR creator_chat_id = ?)"
+)
+SELECT_FUTURE_REMINDERS_SQL = f"""
+SELECT {REMINDER_COLUMNS_SQL}
+FROM reminders
+WHERE remind_at > :now
+ORDER BY remind_at
+"""
+SELECT_USER_REMINDERS_SQL = f"""
+SELECT {REMINDER_COLUMNS_SQL}
+FROM reminders
+WHERE creator_chat_id = ?
+"""
+SELECT_ALL_REMINDERS_SQL = f"""
+SELECT {REMINDER_COLUMNS_SQL}
+FROM reminders
+"""
+DELETE_STALE_REMINDERS_SQL = (
+    "DELETE FROM reminders WHERE repeat_interval_minutes IS NULL AND remind_at <= :now"
+)
+ADVANCE_REPEAT_REMINDERS_SQL = """
+UPDATE reminders
+SET remind_at = remind_at
+    + ((:now - remind_at) / (repeat_interval_minutes * 60) + 1) * (repeat_interval_minutes * 60)
+WHERE repeat_interval_minutes IS NOT NULL AND remind_at <= :now
+"""
+UPSERT_CONTACT_SQL = """
+INSERT INTO contacts (chat_id, name, name_lc)
+VALUES (?, ?, ?)
+ON CONFLICT(chat_id) DO UPDATE SET
+    name = excluded.name,
+    name_lc = excluded.name_lc
+"""
+SELECT_CONTACT_BY_NAME_SQL = "SELECT chat_id, name FROM contacts WHERE name_lc = ?"
+SELECT_RECENT_CONTACTS_SQL = (
+    "SELECT name_lc, chat_id, name FROM contacts ORDER BY id DESC LIMIT ?"
+)
+SELECT_CONTACTS_SQL = "SELECT name, chat_id FROM contacts ORDER BY name_lc"
+# Room for the fixed statements above. _delete_reminders builds a different IN (...)
+# statement per batch length, so those take extra slots and can evict each other.
+SQLITE_CACHED_STATEMENTS = 256
 
-@dataclass
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_CONN: Optional[sqlite3.Connection] = None
+_DB_LOCK = threading.Lock()
+_CONTACT_CACHE: dict[str, tuple[int, str]] = {}
+_CONTACTS_SORTED: list[tuple[str, int]] = []
+_CONTACTS_LOCK = threading.Lock()
+_PENDING_DELETES: set[int] = set()
+_PENDING_LOCK = threading.Lock()
+
+
+@dataclass(slots=True, frozen=True)
 class Reminder:
     reminder_id: int
     creator_chat_id: int
@@ -28,32 +174,92 @@ class Reminder:
     remind_at: datetime
     message: str
     repeat_interval_minutes: Optional[int] = None
+    remind_at_msk: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "remind_at_msk",
+            self.remind_at.astimezone(MOSCOW_TZ).strftime(DATETIME_FORMAT),
+        )
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        conn = sqlite3.connect(
+            DB_PATH,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=SQLITE_CACHED_STATEMENTS,
+        )
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        _CONN = conn
+    return _CONN
+
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    with _DB_LOCK:
+        yield _get_conn()
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except BaseException:
+        # A failed COMMIT (e.g. SQLITE_BUSY) leaves the transaction open on the shared connection.
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def close_db() -> None:
+    global _CONN
+    with _DB_LOCK:
+        if _CONN is not None:
+            _flush_pending_deletes(_CONN)
+            _CONN.close()
+            _CONN = None
+
+
+async def _run_db(func: Callable[..., T], *args: Any) -> T:
+    # Plain run_in_executor skips the context copy asyncio.to_thread does;
+    # the DB helpers don't read any context variables.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
 
 
 def init_db() -> None:
-    with sqlite3.connect(DB_PATH) as conn:
+    with _db() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS contacts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 chat_id INTEGER UNIQUE NOT NULL,
-                name TEXT NOT NULL
+                name TEXT NOT NULL,
+                name_lc TEXT
             )
             """
         )
+        ensure_column(conn, "contacts", "name_lc", "TEXT")
+        backfill_contact_name_lc(conn)
+        conn.execute("DROP INDEX IF EXISTS idx_contacts_lower_name")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_contacts_name_lc ON contacts(name_lc)")
+        conn.execute(REMINDERS_TABLE_SQL.format(table="reminders"))
+        ensure_column(conn, "reminders", "repeat_interval_minutes", "INTEGER")
+        migrate_remind_at_to_epoch(conn)
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                creator_chat_id INTEGER NOT NULL,
-                target_chat_id INTEGER NOT NULL,
-                remind_at TEXT NOT NULL,
-                message TEXT NOT NULL,
-                repeat_interval_minutes INTEGER
-            )
-            """
+            "CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders(remind_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reminders_creator_time "
+            "ON reminders(creator_chat_id, remind_at)"
         )
-        ensure_column(conn, "reminders", "repeat_interval_minutes", "INTEGER")
 
 
 def ensure_column(conn: sqlite3.Connection, table: str, column: str, column_type: str) -> None:
@@ -62,186 +268,251 @@ def ensure_column(conn: sqlite3.Connection, table: str, column: str, column_type
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
 
 
-def is_admin(chat_id: int) -> bool:
-    return ADMIN_CHAT_ID != 0 and chat_id == ADMIN_CHAT_ID
-
-
-def upsert_contact(chat_id: int, name: str) -> None:
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            """
-            INSERT INTO contacts (chat_id, name)
-            VALUES (?, ?)
-            ON CONFLICT(chat_id) DO UPDATE SET name = excluded.name
-            """,
-            (chat_id, name),
+def backfill_contact_name_lc(conn: sqlite3.Connection) -> None:
+    rows = conn.execute("SELECT id, name FROM contacts WHERE name_lc IS NULL").fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE contacts SET name_lc = ? WHERE id = ?",
+            [(name.lower(), contact_id) for contact_id, name in rows],
         )
 
 
-def get_contact_by_name(name: str) -> Optional[tuple[int, str]]:
-    with sqlite3.connect(DB_PATH) as conn:
-        row = conn.execute(
-            "SELECT chat_id, name FROM contacts WHERE lower(name) = lower(?)",
-            (name,),
-        ).fetchone()
-    return row if row else None
-
-
-def list_contacts() -> list[tuple[str, int]]:
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            "SELECT name, chat_id FROM contacts ORDER BY lower(name)"
-        ).fetchall()
-    return rows
-
+def migrate_remind_at_to_epoch(conn: sqlite3.Connection) -> None:
+    column_types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(reminders)")}
+    if column_types.get("remind_at", "").upper() != "TEXT":
+        return
 
-def add_reminder(
-    creator_chat_id: int,
-    target_chat_id: int,
-    remind_at: datetime,
-    message: str,
-    repeat_interval_minutes: Optional[int],
-) -> int:
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.execute(
+    rows = [
+        (
+            row[0],
+            row[1],
+            row[2],
+            int(datetime.fromisoformat(row[3]).timestamp()),
+            row[4],
+            row[5],
+        )
+        for row in conn.execute(
+            """
+            SELECT id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes
+            FROM reminders
+            """
+        )
+    ]
+    sequence = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'reminders'"
+    ).fetchone()
+
+    with _transaction(conn):
+        conn.execute(REMINDERS_TABLE_SQL.format(table="reminders_new"))
+        conn.executemany(
             """
-            INSERT INTO reminders (
+            INSERT INTO reminders_new (
+                id,
                 creator_chat_id,
                 target_chat_id,
                 remind_at,
                 message,
                 repeat_interval_minutes
             )
-            VALUES (?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
+            rows,
+        )
+        conn.execute("DROP TABLE reminders")
+        conn.execute("ALTER TABLE reminders_new RENAME TO reminders")
+        if sequence:
+            conn.execute(
+                "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'reminders'",
+                (sequence[0],),
+            )
+
+
+def is_admin(chat_id: int) -> bool:
+    return ADMIN_CHAT_ID != 0 and chat_id == ADMIN_CHAT_ID
+
+
+def upsert_contact(chat_id: int, name: str) -> None:
+    with _db() as conn:
+        conn.execute(UPSERT_CONTACT_SQL, (chat_id, name, name.lower()))
+        _CONTACT_CACHE.clear()
+        # Still under the DB lock, so the list sees upserts in the order the DB did.
+        with _CONTACTS_LOCK:
+            for index, (_, contact_chat_id) in enumerate(_CONTACTS_SORTED):
+                if contact_chat_id == chat_id:
+                    del _CONTACTS_SORTED[index]
+                    break
+            insort(_CONTACTS_SORTED, (name, chat_id), key=_contact_sort_key)
+
+
+def get_contact_by_name(name: str) -> Optional[tuple[int, str]]:
+    name_lc = name.lower()
+    with _db() as conn:
+        cached = _CONTACT_CACHE.get(name_lc)
+        if cached:
+            return cached
+        row = conn.execute(SELECT_CONTACT_BY_NAME_SQL, (name_lc,)).fetchone()
+        if not row:
+            return None
+        if len(_CONTACT_CACHE) >= CONTACT_CACHE_SIZE:
+            _CONTACT_CACHE.clear()
+        _CONTACT_CACHE[name_lc] = row
+    return row
+
+
+def warm_contact_cache() -> None:
+    with _db() as conn:
+        rows = conn.execute(SELECT_RECENT_CONTACTS_SQL, (CONTACT_CACHE_SIZE,)).fetchall()
+        _CONTACT_CACHE.clear()
+        # Oldest contact last, so duplicate names resolve like the SQL lookup does.
+        _CONTACT_CACHE.update((name_lc, (chat_id, name)) for name_lc, chat_id, name in rows)
+
+
+def load_sorted_contacts() -> None:
+    with _db() as conn:
+        contacts = conn.execute(SELECT_CONTACTS_SQL).fetchall()
+        with _CONTACTS_LOCK:
+            _CONTACTS_SORTED[:] = contacts
+
+
+def sorted_contacts() -> list[tuple[str, int]]:
+    with _CONTACTS_LOCK:
+        return list(_CONTACTS_SORTED)
+
+
+def _contact_sort_key(contact: tuple[str, int]) -> str:
+    return contact[0].lower()
+
+
+def add_reminder(reminder: Reminder) -> int:
+    with _db() as conn:
+        cursor = conn.execute(
+            INSERT_REMINDER_SQL,
             (
-                creator_chat_id,
-                target_chat_id,
-                remind_at.isoformat(),
-                message,
-                repeat_interval_minutes,
+                reminder.creator_chat_id,
+                reminder.target_chat_id,
+                int(reminder.remind_at.timestamp()),
+                reminder.message,
+                reminder.repeat_interval_minutes,
             ),
         )
         return cursor.lastrowid
 
 
-def update_reminder_time(reminder_id: int, remind_at: datetime) -> None:
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            "UPDATE reminders SET remind_at = ? WHERE id = ?",
-            (remind_at.isoformat(), reminder_id),
+def delete_reminder_if_owner(reminder_id: int, owner_chat_id: Optional[int]) -> bool:
+    with _db() as conn:
+        _flush_pending_deletes(conn)
+        cursor = conn.execute(
+            DELETE_OWNED_REMINDER_SQL,
+            (reminder_id, owner_chat_id, owner_chat_id),
         )
+        return cursor.rowcount > 0
 
 
-def delete_reminder(reminder_id: int) -> None:
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+def queue_reminder_delete(reminder_id: int) -> None:
+    with _PENDING_LOCK:
+        _PENDING_DELETES.add(reminder_id)
 
 
-def load_future_reminders(now: datetime) -> list[Reminder]:
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            """
-            SELECT id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes
-            FROM reminders
-            WHERE remind_at > ?
-            ORDER BY remind_at
-            """,
-            (now.isoformat(),),
-        ).fetchall()
+def flush_pending_deletes() -> None:
+    with _db() as conn:
+        _flush_pending_deletes(conn)
 
-    reminders: list[Reminder] = []
-    for row in rows:
-        remind_at = datetime.fromisoformat(row[3])
-        reminders.append(
-            Reminder(
-                reminder_id=row[0],
-                creator_chat_id=row[1],
-                target_chat_id=row[2],
-                remind_at=remind_at,
-                message=row[4],
-                repeat_interval_minutes=row[5],
-            )
-        )
-    return reminders
 
+def _flush_pending_deletes(conn: sqlite3.Connection) -> None:
+    reminder_ids = _pending_delete_ids()
+    if not reminder_ids:
+        return
+    with _transaction(conn):
+        _delete_reminders(conn, reminder_ids)
+    _forget_pending_deletes(reminder_ids)
 
-def load_user_reminders(chat_id: int) -> list[Reminder]:
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            """
-            SELECT id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes
-            FROM reminders
-            WHERE creator_chat_id = ?
-            ORDER BY remind_at
-            """,
-            (chat_id,),
-        ).fetchall()
 
-    reminders: list[Reminder] = []
-    for row in rows:
-        remind_at = datetime.fromisoformat(row[3])
-        reminders.append(
-            Reminder(
-                reminder_id=row[0],
-                creator_chat_id=row[1],
-                target_chat_id=row[2],
-                remind_at=remind_at,
-                message=row[4],
-                repeat_interval_minutes=row[5],
-            )
-        )
-    return reminders
+def _pending_delete_ids() -> list[int]:
+    with _PENDING_LOCK:
+        return list(_PENDING_DELETES)
 
 
-def load_all_reminders() -> list[Reminder]:
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            """
-            SELECT id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes
-            FROM reminders
-            ORDER BY remind_at
-            """,
-        ).fetchall()
+def _forget_pending_deletes(reminder_ids: list[int]) -> None:
+    with _PENDING_LOCK:
+        _PENDING_DELETES.difference_update(reminder_ids)
 
-    reminders: list[Reminder] = []
-    for row in rows:
-        remind_at = datetime.fromisoformat(row[3])
-        reminders.append(
-            Reminder(
-                reminder_id=row[0],
-                creator_chat_id=row[1],
-                target_chat_id=row[2],
-                remind_at=remind_at,
-                message=row[4],
-                repeat_interval_minutes=row[5],
-            )
+
+def _delete_reminders(conn: sqlite3.Connection, reminder_ids: list[int]) -> None:
+    for start in range(0, len(reminder_ids), DELETE_BATCH_SIZE):
+        batch = reminder_ids[start : start + DELETE_BATCH_SIZE]
+        placeholders = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM reminders WHERE id IN ({placeholders})", batch)
+
+
+def _reminder_row_factory(now: datetime) -> Callable[[sqlite3.Cursor, tuple], Reminder]:
+    now_ts = int(now.timestamp())
+
+    def row_to_reminder(cursor: sqlite3.Cursor, row: tuple) -> Reminder:
+        remind_at_ts = row[3]
+        interval_minutes = row[5]
+        if interval_minutes and remind_at_ts <= now_ts:
+            # Repeating rows keep their first fire time; derive the next one.
+            step = interval_minutes * 60
+            remind_at_ts += ((now_ts - remind_at_ts) // step + 1) * step
+        return Reminder(
+            reminder_id=row[0],
+            creator_chat_id=row[1],
+            target_chat_id=row[2],
+            remind_at=datetime.fromtimestamp(remind_at_ts, tz=timezone.utc),
+            message=row[4],
+            repeat_interval_minutes=interval_minutes,
         )
+
+    return row_to_reminder
+
+
+def _reminder_cursor(conn: sqlite3.Connection, now: Optional[datetime] = None) -> sqlite3.Cursor:
+    cursor = conn.cursor()
+    cursor.row_factory = _reminder_row_factory(now or datetime.now(timezone.utc))
+    return cursor
+
+
+def _sorted_by_time(reminders: list[Reminder]) -> list[Reminder]:
+    # Repeating rows store a past fire time until the next startup fast-forward, so the
+    # order only exists after the row factory has advanced them; ORDER BY can't provide it.
+    reminders.sort(key=attrgetter("remind_at"))
     return reminders
 
 
-def get_reminder(reminder_id: int) -> Optional[Reminder]:
-    with sqlite3.connect(DB_PATH) as conn:
-        row = conn.execute(
-            """
-            SELECT id, creator_chat_id, target_chat_id, remind_at, message, repeat_interval_minutes
-            FROM reminders
-            WHERE id = ?
-            """,
-            (reminder_id,),
-        ).fetchone()
+def fast_forward_reminders(now: datetime) -> None:
+    params = {"now": int(now.timestamp())}
+    with _db() as conn, _transaction(conn):
+        # One-offs missed during downtime will never fire; repeats move to their next slot.
+        conn.execute(DELETE_STALE_REMINDERS_SQL, params)
+        conn.execute(ADVANCE_REPEAT_REMINDERS_SQL, params)
 
-    if not row:
-        return None
 
-    return Reminder(
-        reminder_id=row[0],
-        creator_chat_id=row[1],
-        target_chat_id=row[2],
-        remind_at=datetime.fromisoformat(row[3]),
-        message=row[4],
-        repeat_interval_minutes=row[5],
-    )
+def load_future_reminders(now: datetime) -> list[Reminder]:
+    # Expects fast_forward_reminders(now) first, so repeating rows are already past now.
+    with _db() as conn:
+        return _reminder_cursor(conn, now).execute(
+            SELECT_FUTURE_REMINDERS_SQL,
+            {"now": int(now.timestamp())},
+        ).fetchall()
+
+
+def load_user_reminders(chat_id: int) -> list[Reminder]:
+    with _db() as conn:
+        _flush_pending_deletes(conn)
+        return _sorted_by_time(
+            _reminder_cursor(conn).execute(
+                SELECT_USER_REMINDERS_SQL,
+                (chat_id,),
+            ).fetchall()
+        )
+
+
+def load_all_reminders() -> list[Reminder]:
+    with _db() as conn:
+        _flush_pending_deletes(conn)
+        return _sorted_by_time(
+            _reminder_cursor(conn).execute(SELECT_ALL_REMINDERS_SQL).fetchall()
+        )
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -249,29 +520,25 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     chat_id = update.effective_chat.id
     display_name = update.effective_user.full_name if update.effective_user else str(chat_id)
-    upsert_contact(chat_id, display_name)
-    await update.message.reply_text(
-        "Привет! Я напоминалка.\n"
-        "Ты можешь создавать напоминания только себе через /remindme и /repeatme.\n"
-        "Администратор управляет контактами и напоминаниями других пользователей.",
-    )
+    await _run_db(upsert_contact, chat_id, display_name)
+    await update.message.reply_text(MSG_START)
 
 
 async def setname(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
     if len(context.args) < 2:
-        await update.message.reply_text("Формат: /setname <chat_id> <имя>")
+        await update.message.reply_text(MSG_SETNAME_USAGE)
         return
     chat_id = int(context.args[0])
     name = " ".join(context.args[1:]).strip()
     if not name:
-        await update.message.reply_text("Имя не может быть пустым.")
+        await update.message.reply_text(MSG_EMPTY_NAME)
         return
-    upsert_contact(chat_id, name)
+    await _run_db(upsert_contact, chat_id, name)
     await update.message.reply_text(f"Сохранил имя: {name} (id: {chat_id})")
 
 
@@ -279,28 +546,46 @@ async def contacts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message or not update.effective_chat:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
-    rows = list_contacts()
+    rows = sorted_contacts()
     if not rows:
-        await update.message.reply_text("Контактов пока нет. Используй /setname.")
+        await update.message.reply_text(MSG_NO_CONTACTS)
         return
-    lines = ["Доступные контакты:"]
-    for name, chat_id in rows:
-        lines.append(f"• {name} (id: {chat_id})")
-    await update.message.reply_text("\n".join(lines))
+    await update.message.reply_text(
+        CONTACTS_HEADER
+        + "\n".join(f"• {name} (id: {chat_id})" for name, chat_id in rows)
+    )
 
 
+def _is_digits(part: str, max_len: int) -> bool:
+    return 0 < len(part) <= max_len and part.isascii() and part.isdigit()
+
+
+@lru_cache(maxsize=512)
 def parse_datetime(date_part: str, time_part: str) -> Optional[datetime]:
+    date_fields = date_part.split("-")
+    time_fields = time_part.split(":")
+    if len(date_fields) != 3 or len(time_fields) != 2:
+        return None
+    year, month, day = date_fields
+    hour, minute = time_fields
+    # Same shapes strptime accepted: a 4-digit year, 1-2 digits for everything else.
+    if len(year) != 4 or not _is_digits(year, 4):
+        return None
+    if not all(_is_digits(value, 2) for value in (month, day, hour, minute)):
+        return None
     try:
-        local_dt = datetime.strptime(f"{date_part} {time_part}", DATETIME_FORMAT)
-        return local_dt.replace(tzinfo=MOSCOW_TZ).astimezone(timezone.utc)
+        local_dt = datetime(
+            int(year), int(month), int(day), int(hour), int(minute), tzinfo=MOSCOW_TZ
+        )
     except ValueError:
         return None
+    return local_dt.astimezone(timezone.utc)
 
 
-def validate_future(remind_at: datetime) -> bool:
-    return remind_at > datetime.now(timezone.utc)
+def validate_future(remind_at: datetime, now: datetime) -> bool:
+    return remind_at > now
 
 
 def ensure_message(message: str) -> Optional[str]:
@@ -309,57 +594,44 @@ def ensure_message(message: str) -> Optional[str]:
 
 
 def schedule_reminder_job(application: Application, reminder: Reminder) -> None:
-    delay = (reminder.remind_at - datetime.now(timezone.utc)).total_seconds()
-    if delay <= 0:
+    name = f"reminder-{reminder.reminder_id}"
+    if reminder.repeat_interval_minutes:
+        application.job_queue.run_repeating(
+            send_reminder,
+            interval=timedelta(minutes=reminder.repeat_interval_minutes),
+            first=reminder.remind_at,
+            data=reminder,
+            name=name,
+        )
         return
     application.job_queue.run_once(
         send_reminder,
-        when=delay,
+        when=reminder.remind_at,
         data=reminder,
-        name=f"reminder-{reminder.reminder_id}",
+        name=name,
     )
 
 
+def unschedule_reminder_job(application: Application, reminder_id: int) -> None:
+    for job in application.job_queue.get_jobs_by_name(f"reminder-{reminder_id}"):
+        job.schedule_removal()
+
+
 def build_reminder_line(reminder: Reminder) -> str:
     repeat = (
         f" (повтор каждые {reminder.repeat_interval_minutes} мин.)"
         if reminder.repeat_interval_minutes
         else ""
     )
-    local_time = reminder.remind_at.astimezone(MOSCOW_TZ)
     return (
-        f"#{reminder.reminder_id} на {local_time.strftime(DATETIME_FORMAT)} МСК"
+        f"#{reminder.reminder_id} на {reminder.remind_at_msk} МСК"
         f" — {reminder.message}{repeat}"
     )
 
 
-def create_reminder(
-    creator_chat_id: int,
-    target_chat_id: int,
-    remind_at: datetime,
-    message: str,
-    repeat_interval_minutes: Optional[int],
-    application: Application,
-) -> int:
-    reminder_id = add_reminder(
-        creator_chat_id=creator_chat_id,
-        target_chat_id=target_chat_id,
-        remind_at=remind_at,
-        message=message,
-        repeat_interval_minutes=repeat_interval_minutes,
-    )
-
-    schedule_reminder_job(
-        application,
-        Reminder(
-            reminder_id=reminder_id,
-            creator_chat_id=creator_chat_id,
-            target_chat_id=target_chat_id,
-            remind_at=remind_at,
-            message=message,
-            repeat_interval_minutes=repeat_interval_minutes,
-        ),
-    )
+async def create_reminder(reminder: Reminder, application: Application) -> int:
+    reminder_id = await _run_db(add_reminder, reminder)
+    schedule_reminder_job(application, replace(reminder, reminder_id=reminder_id))
     return reminder_id
 
 
@@ -367,40 +639,38 @@ async def remindme(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if len(context.args) < 3:
-        await update.message.reply_text(
-            "Формат: /remindme <YYYY-MM-DD> <HH:MM> <текст>"
-        )
+        await update.message.reply_text(MSG_REMINDME_USAGE)
         return
 
     date_part = context.args[0]
     time_part = context.args[1]
     message = ensure_message(" ".join(context.args[2:]))
     if not message:
-        await update.message.reply_text("Текст напоминания не может быть пустым.")
+        await update.message.reply_text(MSG_EMPTY_MESSAGE)
         return
 
     remind_at = parse_datetime(date_part, time_part)
     if not remind_at:
-        await update.message.reply_text(
-            "Не могу разобрать дату. Используй формат YYYY-MM-DD HH:MM (МСК)."
-        )
+        await update.message.reply_text(MSG_BAD_DATE)
         return
 
-    if not validate_future(remind_at):
-        await update.message.reply_text("Дата должна быть в будущем.")
+    now = datetime.now(timezone.utc)
+    if not validate_future(remind_at, now):
+        await update.message.reply_text(MSG_PAST_DATE)
         return
 
-    create_reminder(
+    reminder = Reminder(
+        reminder_id=0,
         creator_chat_id=update.effective_chat.id,
         target_chat_id=update.effective_chat.id,
         remind_at=remind_at,
         message=message,
         repeat_interval_minutes=None,
-        application=context.application,
     )
+    await create_reminder(reminder, context.application)
 
     await update.message.reply_text(
-        f"Напоминание запланировано на {remind_at.astimezone(MOSCOW_TZ).strftime(DATETIME_FORMAT)} МСК."
+        f"Напоминание запланировано на {reminder.remind_at_msk} МСК."
     )
 
 
@@ -408,9 +678,7 @@ async def repeatme(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if len(context.args) < 4:
-        await update.message.reply_text(
-            "Формат: /repeatme <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>"
-        )
+        await update.message.reply_text(MSG_REPEATME_USAGE)
         return
 
     date_part = context.args[0]
@@ -418,40 +686,40 @@ async def repeatme(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         interval_minutes = int(context.args[2])
     except ValueError:
-        await update.message.reply_text("Интервал должен быть числом (в минутах).")
+        await update.message.reply_text(MSG_BAD_INTERVAL)
         return
     if interval_minutes <= 0:
-        await update.message.reply_text("Интервал должен быть больше нуля.")
+        await update.message.reply_text(MSG_NONPOSITIVE_INTERVAL)
         return
 
     message = ensure_message(" ".join(context.args[3:]))
     if not message:
-        await update.message.reply_text("Текст напоминания не может быть пустым.")
+        await update.message.reply_text(MSG_EMPTY_MESSAGE)
         return
 
     remind_at = parse_datetime(date_part, time_part)
     if not remind_at:
-        await update.message.reply_text(
-            "Не могу разобрать дату. Используй формат YYYY-MM-DD HH:MM (МСК)."
-        )
+        await update.message.reply_text(MSG_BAD_DATE)
         return
 
-    if not validate_future(remind_at):
-        await update.message.reply_text("Дата должна быть в будущем.")
+    now = datetime.now(timezone.utc)
+    if not validate_future(remind_at, now):
+        await update.message.reply_text(MSG_PAST_DATE)
         return
 
-    create_reminder(
+    reminder = Reminder(
+        reminder_id=0,
         creator_chat_id=update.effective_chat.id,
         target_chat_id=update.effective_chat.id,
         remind_at=remind_at,
         message=message,
         repeat_interval_minutes=interval_minutes,
-        application=context.application,
     )
+    await create_reminder(reminder, context.application)
 
     await update.message.reply_text(
         "Повторяющееся напоминание создано. "
-        f"Старт: {remind_at.astimezone(MOSCOW_TZ).strftime(DATETIME_FORMAT)} МСК, "
+        f"Старт: {reminder.remind_at_msk} МСК, "
         f"интервал: {interval_minutes} мин."
     )
 
@@ -459,34 +727,32 @@ async def repeatme(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def my(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
-    reminders = load_user_reminders(update.effective_chat.id)
+    reminders = await _run_db(load_user_reminders, update.effective_chat.id)
     if not reminders:
-        await update.message.reply_text("У тебя нет активных напоминаний.")
+        await update.message.reply_text(MSG_NO_USER_REMINDERS)
         return
-    lines = ["Твои напоминания:"]
-    for reminder in reminders:
-        lines.append(build_reminder_line(reminder))
-    await update.message.reply_text("\n".join(lines))
+    await update.message.reply_text(
+        USER_REMINDERS_HEADER + "\n".join(map(build_reminder_line, reminders))
+    )
 
 
 async def cancelme(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if not context.args:
-        await update.message.reply_text("Формат: /cancelme <id>")
+        await update.message.reply_text(MSG_CANCELME_USAGE)
         return
     try:
         reminder_id = int(context.args[0])
     except ValueError:
-        await update.message.reply_text("ID должен быть числом.")
+        await update.message.reply_text(MSG_BAD_ID)
         return
 
-    reminder = get_reminder(reminder_id)
-    if not reminder or reminder.creator_chat_id != update.effective_chat.id:
-        await update.message.reply_text("Напоминание не найдено.")
+    if not await _run_db(delete_reminder_if_owner, reminder_id, update.effective_chat.id):
+        await update.message.reply_text(MSG_REMINDER_NOT_FOUND)
         return
 
-    delete_reminder(reminder_id)
+    unschedule_reminder_job(context.application, reminder_id)
     await update.message.reply_text(f"Напоминание #{reminder_id} отменено.")
 
 
@@ -494,13 +760,10 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
     if len(context.args) < 4:
-        await update.message.reply_text(
-            "Формат: /remind <имя> <YYYY-MM-DD> <HH:MM> <текст>\n"
-            "Пример: /remind Иван 2024-12-31 09:00 Позвонить"
-        )
+        await update.message.reply_text(MSG_REMIND_USAGE)
         return
 
     name = context.args[0]
@@ -508,39 +771,37 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     time_part = context.args[2]
     message = ensure_message(" ".join(context.args[3:]))
     if not message:
-        await update.message.reply_text("Текст напоминания не может быть пустым.")
+        await update.message.reply_text(MSG_EMPTY_MESSAGE)
         return
 
-    contact = get_contact_by_name(name)
+    contact = await _run_db(get_contact_by_name, name)
     if not contact:
-        await update.message.reply_text(
-            "Контакт не найден. Проверь /contacts или попроси человека сделать /start."
-        )
+        await update.message.reply_text(MSG_CONTACT_NOT_FOUND_START)
         return
 
     remind_at = parse_datetime(date_part, time_part)
     if not remind_at:
-        await update.message.reply_text(
-            "Не могу разобрать дату. Используй формат YYYY-MM-DD HH:MM (МСК)."
-        )
+        await update.message.reply_text(MSG_BAD_DATE)
         return
 
-    if not validate_future(remind_at):
-        await update.message.reply_text("Дата должна быть в будущем.")
+    now = datetime.now(timezone.utc)
+    if not validate_future(remind_at, now):
+        await update.message.reply_text(MSG_PAST_DATE)
         return
 
-    create_reminder(
+    reminder = Reminder(
+        reminder_id=0,
         creator_chat_id=update.effective_chat.id,
         target_chat_id=contact[0],
         remind_at=remind_at,
         message=message,
         repeat_interval_minutes=None,
-        application=context.application,
     )
+    await create_reminder(reminder, context.application)
 
     await update.message.reply_text(
         f"Напоминание для {contact[1]} запланировано на "
-        f"{remind_at.astimezone(MOSCOW_TZ).strftime(DATETIME_FORMAT)} МСК."
+        f"{reminder.remind_at_msk} МСК."
     )
 
 
@@ -548,12 +809,10 @@ async def repeat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
     if len(context.args) < 5:
-        await update.message.reply_text(
-            "Формат: /repeat <имя> <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>"
-        )
+        await update.message.reply_text(MSG_REPEAT_USAGE)
         return
 
     name = context.args[0]
@@ -562,41 +821,41 @@ async def repeat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         interval_minutes = int(context.args[3])
     except ValueError:
-        await update.message.reply_text("Интервал должен быть числом (в минутах).")
+        await update.message.reply_text(MSG_BAD_INTERVAL)
         return
     if interval_minutes <= 0:
-        await update.message.reply_text("Интервал должен быть больше нуля.")
+        await update.message.reply_text(MSG_NONPOSITIVE_INTERVAL)
         return
 
     message = ensure_message(" ".join(context.args[4:]))
     if not message:
-        await update.message.reply_text("Текст напоминания не может быть пустым.")
+        await update.message.reply_text(MSG_EMPTY_MESSAGE)
         return
 
-    contact = get_contact_by_name(name)
+    contact = await _run_db(get_contact_by_name, name)
     if not contact:
-        await update.message.reply_text("Контакт не найден. Проверь /contacts.")
+        await update.message.reply_text(MSG_CONTACT_NOT_FOUND)
         return
 
     remind_at = parse_datetime(date_part, time_part)
     if not remind_at:
-        await update.message.reply_text(
-            "Не могу разобрать дату. Используй формат YYYY-MM-DD HH:MM (МСК)."
-        )
+        await update.message.reply_text(MSG_BAD_DATE)
         return
 
-    if not validate_future(remind_at):
-        await update.message.reply_text("Дата должна быть в будущем.")
+    now = datetime.now(timezone.utc)
+    if not validate_future(remind_at, now):
+        await update.message.reply_text(MSG_PAST_DATE)
         return
 
-    create_reminder(
+    reminder = Reminder(
+        reminder_id=0,
         creator_chat_id=update.effective_chat.id,
         target_chat_id=contact[0],
         remind_at=remind_at,
         message=message,
         repeat_interval_minutes=interval_minutes,
-        application=context.application,
     )
+    await create_reminder(reminder, context.application)
 
     await update.message.reply_text(
         "Повторяющееся напоминание создано для "
@@ -608,98 +867,81 @@ async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if not update.effective_chat or not update.message:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
-    reminders = load_all_reminders()
+    reminders = await _run_db(load_all_reminders)
     if not reminders:
-        await update.message.reply_text("Напоминаний нет.")
+        await update.message.reply_text(MSG_NO_REMINDERS)
         return
-    lines = ["Все напоминания:"]
-    for reminder in reminders:
-        lines.append(
+    await update.message.reply_text(
+        ALL_REMINDERS_HEADER
+        + "\n".join(
             f"{build_reminder_line(reminder)} (creator: {reminder.creator_chat_id}, "
             f"target: {reminder.target_chat_id})"
+            for reminder in reminders
         )
-    await update.message.reply_text("\n".join(lines))
+    )
 
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.effective_chat or not update.message:
         return
     if not is_admin(update.effective_chat.id):
-        await update.message.reply_text("Эта команда доступна только администратору.")
+        await update.message.reply_text(MSG_ADMIN_ONLY)
         return
     if not context.args:
-        await update.message.reply_text("Формат: /cancel <id>")
+        await update.message.reply_text(MSG_CANCEL_USAGE)
         return
     try:
         reminder_id = int(context.args[0])
     except ValueError:
-        await update.message.reply_text("ID должен быть числом.")
+        await update.message.reply_text(MSG_BAD_ID)
         return
 
-    reminder = get_reminder(reminder_id)
-    if not reminder:
-        await update.message.reply_text("Напоминание не найдено.")
+    if not await _run_db(delete_reminder_if_owner, reminder_id, None):
+        await update.message.reply_text(MSG_REMINDER_NOT_FOUND)
         return
 
-    delete_reminder(reminder_id)
+    unschedule_reminder_job(context.application, reminder_id)
     await update.message.reply_text(f"Напоминание #{reminder_id} отменено.")
 
 
 async def send_reminder(context: ContextTypes.DEFAULT_TYPE) -> None:
     reminder: Reminder = context.job.data
-    await context.bot.send_message(
-        chat_id=reminder.target_chat_id,
-        text=f"Напоминание: {reminder.message}",
-    )
-
-    if reminder.repeat_interval_minutes:
-        next_time = reminder.remind_at + timedelta(minutes=reminder.repeat_interval_minutes)
-        update_reminder_time(reminder.reminder_id, next_time)
-        schedule_reminder_job(
-            context.application,
-            Reminder(
-                reminder_id=reminder.reminder_id,
-                creator_chat_id=reminder.creator_chat_id,
-                target_chat_id=reminder.target_chat_id,
-                remind_at=next_time,
-                message=reminder.message,
-                repeat_interval_minutes=reminder.repeat_interval_minutes,
-            ),
+    if not reminder.repeat_interval_minutes:
+        queue_reminder_delete(reminder.reminder_id)
+    try:
+        await context.bot.send_message(
+            chat_id=reminder.target_chat_id,
+            text=f"Напоминание: {reminder.message}",
         )
-        return
+    except Exception:
+        logger.exception("Failed to send reminder #%s", reminder.reminder_id)
 
-    delete_reminder(reminder.reminder_id)
+
+async def sweep_pending_deletes(context: ContextTypes.DEFAULT_TYPE) -> None:
+    await _run_db(flush_pending_deletes)
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not update.message:
         return
-    await update.message.reply_text(
-        (
-            "Команды для всех пользователей:\n"
-            "/remindme <YYYY-MM-DD> <HH:MM> <текст>\n"
-            "/repeatme <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>\n"
-            "/my — список своих напоминаний\n"
-            "/cancelme <id> — отменить своё напоминание\n\n"
-            "Команды администратора:\n"
-            "/contacts — список контактов\n"
-            "/setname <chat_id> <имя> — задать имя контакта\n"
-            "/remind <имя> <YYYY-MM-DD> <HH:MM> <текст>\n"
-            "/repeat <имя> <YYYY-MM-DD> <HH:MM> <интервал_мин> <текст>\n"
-            "/list — список всех напоминаний\n"
-            "/cancel <id> — отменить напоминание\n\n"
-            "Время указывается в МСК."
-        ),
-        parse_mode=ParseMode.HTML,
-    )
+    await update.message.reply_text(MSG_HELP)
 
 
 async def on_startup(application: Application) -> None:
+    await _run_db(warm_contact_cache)
+    await _run_db(load_sorted_contacts)
     now = datetime.now(timezone.utc)
-    for reminder in load_future_reminders(now):
+    await _run_db(fast_forward_reminders, now)
+    for reminder in await _run_db(load_future_reminders, now):
         schedule_reminder_job(application, reminder)
+    application.job_queue.run_repeating(
+        sweep_pending_deletes,
+        interval=DELETE_SWEEP_INTERVAL_SECONDS,
+        first=DELETE_SWEEP_INTERVAL_SECONDS,
+        name="sweep-pending-deletes",
+    )
 
 
 def main() -> None:
@@ -709,6 +951,7 @@ def main() -> None:
 
     logging.basicConfig(level=logging.INFO)
     init_db()
+    atexit.register(close_db)
 
     application = Application.builder().token(token).build()
 